@@ -22,13 +22,14 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import importlib
+import concurrent.futures
+import functools
 import os
 import unittest
 
-x86_feature_check = importlib.import_module('x86-feature-check')
-importlib.invalidate_caches()
+import x86_feature_check
 
+@functools.lru_cache(maxsize = None)
 def get_resource(filename):
     """Returns the content of a resource with the given filename."""
 
@@ -41,11 +42,39 @@ def get_resource(filename):
 class Test_Main(unittest.TestCase):
     def test_get_current_cpu_flags(self):
         current_flags = x86_feature_check.get_current_cpu_flags()
-        self.assertTrue(isinstance(current_flags, set))
+        self.assertTrue(isinstance(current_flags, frozenset))
 
         for flag in current_flags:
             self.assertTrue(isinstance(flag, str))
 
+    def test_get_cpuid_flags(self):
+        cpuid_flags = x86_feature_check.get_cpuid_flags()
+        if cpuid_flags is None:
+            self.skipTest('cpuid not available')
+
+        cpuinfo = x86_feature_check.get_cpuinfo()
+        if cpuinfo == b'':
+            self.skipTest('/proc/cpuinfo not available')
+
+        # cpuid and /proc/cpuinfo should agree on all flags we know about
+        cpuinfo_flags = x86_feature_check.extract_cpu_flags(cpuinfo)
+        self.assertEqual(
+            cpuinfo_flags & set(x86_feature_check.CPUID_FLAGS),
+            cpuid_flags)
+
+    def test_get_cpuinfo_flags(self):
+        cpuinfo = x86_feature_check.get_cpuinfo()
+        if cpuinfo == b'':
+            self.skipTest('/proc/cpuinfo not available')
+
+        # The first flags line must not report flags not in /proc/cpuinfo
+        cpuinfo_flags = x86_feature_check.get_cpuinfo_flags()
+        self.assertTrue(isinstance(cpuinfo_flags, frozenset))
+        self.assertTrue(cpuinfo_flags)
+        self.assertLessEqual(
+            cpuinfo_flags,
+            x86_feature_check.extract_cpu_flags(cpuinfo))
+
 class Test_X86Levels(unittest.TestCase):
     """
     Map from CPU Name to expected maximum feature set
@@ -101,19 +130,35 @@ class Test_X86Levels(unittest.TestCase):
         'Intel_Xeon_Scalable_6130_Gold':   'x86-64-v4',
     }
 
+    @staticmethod
+    def parse_resource(cpu_name):
+        """Returns cpuinfo, flags and max feature set of the given CPU."""
+
+        cpuinfo = get_resource(cpu_name)
+        flags = x86_feature_check.extract_cpu_flags(cpuinfo)
+        feature_set = x86_feature_check.get_max_architecture_level(flags)
+        return cpuinfo, flags, feature_set
+
     def test_x86_levels(self):
-        for cpu_name, expected_feature_set in self.LEVELMAP.items():
+        # Reading and parsing the resources is independent for every CPU
+        with concurrent.futures.ThreadPoolExecutor(max_workers = os.cpu_count()) as executor:
+            futures = {
+                cpu_name: executor.submit(self.parse_resource, cpu_name)
+                for cpu_name in self.LEVELMAP
+            }
+
+        for cpu_name, future in futures.items():
+            expected_feature_set = self.LEVELMAP[cpu_name]
             with self.subTest(
                     cpu_name = cpu_name,
                     expected_feature_set = expected_feature_set):
 
-                cpuinfo = get_resource(cpu_name)
-                self.assertTrue(isinstance(cpuinfo, str))
-
-                flags = x86_feature_check.extract_cpu_flags(cpuinfo)
-                self.assertTrue(isinstance(flags, set))
+                # Exceptions of the worker are raised here and
+                # reported for this CPU only
+                cpuinfo, flags, feature_set = future.result()
 
-                feature_set = x86_feature_check.get_max_architecture_level(flags)
+                self.assertTrue(isinstance(cpuinfo, str))
+                self.assertTrue(isinstance(flags, frozenset))
                 self.assertTrue(isinstance(feature_set, str))
 
                 self.assertEqual(
@@ -123,6 +168,24 @@ class Test_X86Levels(unittest.TestCase):
                         cpu_name,
                         expected_feature_set))
 
+    def test_extract_cpu_flags_from_bytes(self):
+        cpuinfo = get_resource('AMD_EPYC_7543')
+        self.assertEqual(
+            x86_feature_check.extract_cpu_flags(cpuinfo),
+            x86_feature_check.extract_cpu_flags(cpuinfo.encode('ascii')))
+
+    def test_x86_levels_are_additive(self):
+        cpuinfo = get_resource('Intel_Xeon_Scalable_6130_Gold')
+        # Without CMPXCHG16B none of the later levels can be supported
+        flags = x86_feature_check.extract_cpu_flags(cpuinfo) - {'cx16'}
+
+        self.assertEqual(
+            'x86-64',
+            x86_feature_check.get_max_architecture_level(flags))
+        self.assertEqual(
+            ['x86-64'],
+            x86_feature_check.get_all_architecture_levels(flags))
+
 if __name__ == '__main__':
     # cd to directory of this python file
     os.chdir(os.path.dirname(__file__))
@@ -0,0 +1,694 @@
+#!/usr/bin/env python3
+
+# MIT License
+#
+# Copyright (c) 2021 Ansgar Klein, Robert Redl
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import ctypes
+import functools
+import mmap
+import operator
+import platform
+import re
+import sys
+
+from typing import AbstractSet
+from typing import Callable
+from typing import Dict
+from typing import FrozenSet
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import Union
+
+FLAG_NAMES = {
+    'AVX2': ('avx2',),
+    'AVX512BW': ('avx512bw',),
+    'AVX512CD': ('avx512cd',),
+    'AVX512DQ': ('avx512dq',),
+    'AVX512F': ('avx512f',),
+    'AVX512VL': ('avx512vl',),
+    'AVX': ('avx',),
+    'BMI1': ('bmi1',),
+    'BMI2': ('bmi2',),
+    'CMOV': ('cmov',),
+    'CMPXCHG16B': ('cx16',),
+    'CMPXCHG8B': ('cx8',),
+    'F16C': ('f16c',),
+    'FMA': ('fma',),
+    'FPU': ('fpu',),
+    'FXSR': ('fxsr', 'fxsr_opt'),
+    'LAHF': ('lahf_lm',),
+    'LZCNT': ('abm',),
+    'MMX': ('mmx', 'mmxext'),
+    'MOVBE': ('movbe',),
+    'OSXSAVE': ('xsave',),
+    'POPCNT': ('popcnt', 'abm'),
+    'SCE': ('syscall',),
+    'SSE2': ('sse2',),
+    'SSE3': ('sse3', 'ssse3', 'pni'),
+    'SSE4-1': ('sse4_1',),
+    'SSE4-2': ('sse4_2',),
+    'SSE': ('sse',),
+    'SSSE3': ('ssse3',),
+} # type: Dict[str, Tuple[str, ...]]
+
+REQUIRED_FEATURES = {
+    'x86-64-v4': [
+        'AVX512BW',
+        'AVX512CD',
+        'AVX512DQ',
+        'AVX512F',
+        'AVX512VL',
+    ],
+    'x86-64-v3': [
+        'AVX',
+        'AVX2',
+        'BMI1',
+        'BMI2',
+        'F16C',
+        'FMA',
+        'LZCNT',
+        'MOVBE',
+        'OSXSAVE',
+    ],
+    'x86-64-v2': [
+        'CMPXCHG16B',
+        'LAHF',
+        'POPCNT',
+        'SSE3',
+        'SSE4-1',
+        'SSE4-2',
+        'SSSE3',
+    ],
+    'x86-64': [
+        'CMOV',
+        'CMPXCHG8B',
+        'FPU',
+        'FXSR',
+        'MMX',
+        'SCE',
+        'SSE',
+        'SSE2',
+    ],
+} # type: Dict[str, List[str]]
+
+"""
+Expression matching lines of /proc/cpuinfo that define flags
+"""
+FLAG_LINE_EXPRESSION = re.compile(r'^[ \t]*flags[ \t]*:(.*)$', re.MULTILINE)
+FLAG_LINE_BYTES_EXPRESSION = re.compile(rb'^[ \t]*flags[ \t]*:(.*)$', re.MULTILINE)
+
+"""
+List of microarchitecture levels where first entry is the most advanced level
+"""
+MICROARCHITECTURE_LEVELS = [
+    'x86-64-v4',
+    'x86-64-v3',
+    'x86-64-v2',
+    'x86-64',
+] # type: List[str]
+
+
+def _validate() -> None:
+    """
+    Validates the static tables above once so that checks do not have to.
+
+    :raises Exception: If the tables are inconsistent
+    """
+
+    for feature, flags in FLAG_NAMES.items():
+        if not isinstance(feature, str):
+            raise Exception('Feature "{}" is not of type str'.format(feature))
+        if not isinstance(flags, tuple) or not all(isinstance(flag, str) for flag in flags):
+            raise Exception('Flags of feature "{}" are not a tuple of str'.format(feature))
+
+    for level, features in REQUIRED_FEATURES.items():
+        for feature in features:
+            if feature not in FLAG_NAMES:
+                raise Exception('Unknown feature flag "{}" required by "{}"'.format(feature, level))
+
+    if set(MICROARCHITECTURE_LEVELS) != set(REQUIRED_FEATURES):
+        raise Exception('Microarchitecture levels do not match required features')
+
+
+_validate()
+
+"""
+Map from every flag to the features it signals support of
+"""
+FLAG_FEATURES = {
+    flag: tuple(
+        feature
+        for feature in sorted(FLAG_NAMES)
+        if flag in FLAG_NAMES[feature]
+    )
+    for flag in set(
+        flag
+        for flags in FLAG_NAMES.values()
+        for flag in flags
+    )
+} # type: Dict[str, Tuple[str, ...]]
+
+"""
+Map from every known feature to a distinct bit
+"""
+FEATURE_BITS = {
+    feature: 1 << index
+    for index, feature in enumerate(sorted(FLAG_NAMES))
+} # type: Dict[str, int]
+
+"""
+Map from every flag to the bits of the features it signals support of
+"""
+FLAG_BITS = {
+    flag: sum(FEATURE_BITS[feature] for feature in features)
+    for flag, features in FLAG_FEATURES.items()
+} # type: Dict[str, int]
+
+"""
+Required features of every microarchitecture level encoded as bit mask
+"""
+LEVEL_MASKS = {
+    level: sum(FEATURE_BITS[feature] for feature in features)
+    for level, features in REQUIRED_FEATURES.items()
+} # type: Dict[str, int]
+
+"""
+Required features of every microarchitecture level including the required
+features of all previous levels encoded as bit mask. Microarchitecture levels
+are additive so a level is only supported if all previous levels are
+supported as well.
+"""
+CUMULATIVE_MASKS = {
+    level: functools.reduce(
+        operator.or_,
+        (LEVEL_MASKS[previous_level] for previous_level in MICROARCHITECTURE_LEVELS[index:]))
+    for index, level in enumerate(MICROARCHITECTURE_LEVELS)
+} # type: Dict[str, int]
+
+"""
+Machine code (x86-64 System V ABI) of
+void cpuid(uint32_t leaf, uint32_t subleaf, uint32_t registers[4])
+storing eax, ebx, ecx and edx after executing the cpuid instruction.
+"""
+CPUID_CODE = bytes([
+    0x53,                   # push rbx
+    0x49, 0x89, 0xd0,       # mov  r8, rdx
+    0x89, 0xf8,             # mov  eax, edi
+    0x89, 0xf1,             # mov  ecx, esi
+    0x0f, 0xa2,             # cpuid
+    0x41, 0x89, 0x00,       # mov  [r8], eax
+    0x41, 0x89, 0x58, 0x04, # mov  [r8 + 4], ebx
+    0x41, 0x89, 0x48, 0x08, # mov  [r8 + 8], ecx
+    0x41, 0x89, 0x50, 0x0c, # mov  [r8 + 12], edx
+    0x5b,                   # pop  rbx
+    0xc3,                   # ret
+]) # type: bytes
+
+"""
+Machine code (x86-64 System V ABI) of
+uint64_t xgetbv(uint32_t index)
+returning edx:eax after executing the xgetbv instruction.
+"""
+XGETBV_CODE = bytes([
+    0x89, 0xf9,             # mov  ecx, edi
+    0x0f, 0x01, 0xd0,       # xgetbv
+    0x48, 0xc1, 0xe2, 0x20, # shl  rdx, 32
+    0x48, 0x09, 0xd0,       # or   rax, rdx
+    0xc3,                   # ret
+]) # type: bytes
+
+CPUID_EAX = 0
+CPUID_EBX = 1
+CPUID_ECX = 2
+CPUID_EDX = 3
+
+"""
+Map from /proc/cpuinfo flag name to the (leaf, register, bit) of cpuid
+signaling it
+"""
+CPUID_FLAGS = {
+    'abm': (0x80000001, CPUID_ECX, 5),
+    'avx2': (0x00000007, CPUID_EBX, 5),
+    'avx512bw': (0x00000007, CPUID_EBX, 30),
+    'avx512cd': (0x00000007, CPUID_EBX, 28),
+    'avx512dq': (0x00000007, CPUID_EBX, 17),
+    'avx512f': (0x00000007, CPUID_EBX, 16),
+    'avx512vl': (0x00000007, CPUID_EBX, 31),
+    'avx': (0x00000001, CPUID_ECX, 28),
+    'bmi1': (0x00000007, CPUID_EBX, 3),
+    'bmi2': (0x00000007, CPUID_EBX, 8),
+    'cmov': (0x00000001, CPUID_EDX, 15),
+    'cx16': (0x00000001, CPUID_ECX, 13),
+    'cx8': (0x00000001, CPUID_EDX, 8),
+    'f16c': (0x00000001, CPUID_ECX, 29),
+    'fma': (0x00000001, CPUID_ECX, 12),
+    'fpu': (0x00000001, CPUID_EDX, 0),
+    'fxsr': (0x00000001, CPUID_EDX, 24),
+    'fxsr_opt': (0x80000001, CPUID_EDX, 25),
+    'lahf_lm': (0x80000001, CPUID_ECX, 0),
+    'mmx': (0x00000001, CPUID_EDX, 23),
+    'mmxext': (0x80000001, CPUID_EDX, 22),
+    'movbe': (0x00000001, CPUID_ECX, 22),
+    'pni': (0x00000001, CPUID_ECX, 0),
+    'popcnt': (0x00000001, CPUID_ECX, 23),
+    'sse2': (0x00000001, CPUID_EDX, 26),
+    'sse4_1': (0x00000001, CPUID_ECX, 19),
+    'sse4_2': (0x00000001, CPUID_ECX, 20),
+    'sse': (0x00000001, CPUID_EDX, 25),
+    'ssse3': (0x00000001, CPUID_ECX, 9),
+    'syscall': (0x80000001, CPUID_EDX, 11),
+    'xsave': (0x00000001, CPUID_ECX, 26),
+} # type: Dict[str, Tuple[int, int, int]]
+
+"""
+Flags that can only be used if the operating system enabled the xsave
+instruction (signaled by cpuid leaf 1, ecx bit 27)
+"""
+XSAVE_FLAGS = frozenset([
+    'xsave',
+]) # type: FrozenSet[str]
+
+"""
+Flags that can only be used if the operating system saves SSE and AVX state
+(xcr0 bits 1 and 2)
+"""
+AVX_FLAGS = frozenset([
+    'avx',
+    'avx2',
+    'f16c',
+    'fma',
+]) # type: FrozenSet[str]
+XCR0_AVX = 0x06
+
+"""
+Flags that can only be used if the operating system additionally saves
+AVX-512 state (xcr0 bits 5, 6 and 7)
+"""
+AVX512_FLAGS = frozenset([
+    'avx512bw',
+    'avx512cd',
+    'avx512dq',
+    'avx512f',
+    'avx512vl',
+]) # type: FrozenSet[str]
+XCR0_AVX512 = 0xe6
+
+
+def main() -> int:
+    """
+    Main function
+
+    :return: 0 on success, non-zero on error
+    :rtype: int
+    """
+    # parse command line arguments
+    parser = argparse.ArgumentParser(description="Check for supported x86_64 feature sets.")
+    parser.add_argument("--all", action='store_true', help="show not only the latest, but all supported feature sets.")
+    args = parser.parse_args()
+
+    flags = get_current_cpu_flags()
+
+    if args.all:
+        feature_sets = get_all_architecture_levels(flags)
+        if len(feature_sets) == 0:
+            print('No x86-64 feature set fully supported!', file = sys.stderr)
+            return 1
+
+        print(' '.join(feature_sets))
+    else:
+        feature_set = get_max_architecture_level(flags)
+        if feature_set is None:
+            print('No x86-64 feature set fully supported!', file = sys.stderr)
+            return 1
+
+        print(feature_set)
+
+    return 0
+
+
+def get_cpuinfo() -> bytes:
+    """
+    Returns the content of the /proc/cpuinfo file.
+
+    The content is not decoded because only the few flags are of interest.
+
+    :return: Content of /proc/cpuinfo or empty bytes if not found
+    :rtype: bytes
+    """
+
+    # Read /proc/cpuinfo
+    try:
+        with open('/proc/cpuinfo', 'rb') as f:
+            return f.read()
+    except IOError:
+        print('Error: Could not read /proc/cpuinfo', file = sys.stderr)
+        return b''
+
+
+def get_cpuinfo_flags() -> FrozenSet[str]:
+    """
+    Returns the CPU flags of the first flags line of the /proc/cpuinfo file.
+
+    In practice every CPU reports the same flags, so reading stops at the first
+    flags line instead of reading the whole file which contains one block per
+    CPU. Use extract_cpu_flags() to combine the flags of all flags lines.
+
+    :return: Set of CPU flags or empty set if /proc/cpuinfo could not be read
+    :rtype: frozenset
+    """
+
+    try:
+        with open('/proc/cpuinfo', 'rb') as f:
+            for line in f:
+                match = FLAG_LINE_BYTES_EXPRESSION.match(line)
+                if match is not None:
+                    return frozenset(
+                        flag.decode('ascii', 'replace')
+                        for flag in match.group(1).split())
+    except IOError:
+        print('Error: Could not read /proc/cpuinfo', file = sys.stderr)
+
+    return frozenset()
+
+
+@functools.lru_cache(maxsize = 8)
+def extract_cpu_flags(cpuinfo: Union[str, bytes]) -> FrozenSet[str]:
+    """
+    Extract CPU flags from /proc/cpuinfo string
+
+    :param cpuinfo: Content of /proc/cpuinfo either decoded or as read
+    :type cpuinfo: str or bytes
+
+    :return: Set of CPU flags for which given cpuinfo string indicates support
+    :rtype: frozenset
+    """
+
+    # There could be different flags in different flag lines.
+    # We add all flags from all flag lines to set in order to
+    # get maximum number of flags supported.
+    if isinstance(cpuinfo, bytes):
+        # Only decode the flags instead of the whole content
+        raw_flags = set() # type: Set[bytes]
+        for raw_flag_line in FLAG_LINE_BYTES_EXPRESSION.findall(cpuinfo):
+            raw_flags.update(raw_flag_line.split())
+        return frozenset(flag.decode('ascii', 'replace') for flag in raw_flags)
+
+    flags = set() # type: Set[str]
+    for flag_line in FLAG_LINE_EXPRESSION.findall(cpuinfo):
+        flags.update(flag_line.split())
+
+    return frozenset(flags)
+
+
+def read_cpuid_flags(cpuid: Callable, xgetbv: Callable) -> Set[str]:
+    """
+    Returns CPU flags supported by current cpu using given functions to
+    execute the cpuid and xgetbv instructions.
+
+    :param cpuid: Function executing cpuid, see CPUID_CODE
+    :type cpuid: callable
+
+    :param xgetbv: Function executing xgetbv, see XGETBV_CODE
+    :type xgetbv: callable
+
+    :return: Set of cpu flags supported named like in /proc/cpuinfo
+    :rtype: set
+    """
+
+    registers = (ctypes.c_uint32 * 4)()
+
+    # Only query leaves the cpu knows about
+    cpuid(0x00000000, 0, registers)
+    max_leaf = registers[CPUID_EAX]
+    cpuid(0x80000000, 0, registers)
+    max_extended_leaf = registers[CPUID_EAX]
+
+    leaves = {} # type: Dict[int, Tuple[int, ...]]
+    for leaf, _, _ in CPUID_FLAGS.values():
+        if leaf in leaves:
+            continue
+        if leaf > (max_extended_leaf if leaf >= 0x80000000 else max_leaf):
+            continue
+        cpuid(leaf, 0, registers)
+        leaves[leaf] = tuple(registers)
+
+    flags = set(
+        flag
+        for flag, (leaf, register, bit) in CPUID_FLAGS.items()
+        if leaf in leaves and leaves[leaf][register] >> bit & 1
+    )
+
+    # Features requiring operating system support are only usable if
+    # the operating system enabled saving the corresponding state.
+    xcr0 = 0
+    if 0x00000001 in leaves and leaves[0x00000001][CPUID_ECX] >> 27 & 1:
+        xcr0 = xgetbv(0)
+    else:
+        flags -= XSAVE_FLAGS
+    if xcr0 & XCR0_AVX != XCR0_AVX:
+        flags -= AVX_FLAGS
+    if xcr0 & XCR0_AVX512 != XCR0_AVX512:
+        flags -= AVX512_FLAGS
+
+    return flags
+
+
+def get_cpuid_flags() -> Optional[Set[str]]:
+    """
+    Returns CPU flags supported by current cpu by executing the cpuid
+    instruction directly.
+
+    :return: Set of cpu flags supported named like in /proc/cpuinfo or None
+        if cpuid cannot be executed (not a 64-bit process on x86-64 Linux or
+        no executable memory)
+    :rtype: set
+    """
+
+    # The machine code is x86-64 code using the System V calling convention.
+    # platform.machine() reports the kernel's architecture, so a 32-bit
+    # interpreter on an x86-64 kernel has to be ruled out separately, as
+    # running the code there would crash the process.
+    if not sys.platform.startswith('linux'):
+        return None
+    if platform.machine().lower() not in ('x86_64', 'amd64'):
+        return None
+    if ctypes.sizeof(ctypes.c_void_p) != 8:
+        return None
+
+    try:
+        buffer = mmap.mmap(
+            -1,
+            mmap.PAGESIZE,
+            prot = mmap.PROT_READ | mmap.PROT_WRITE | mmap.PROT_EXEC)
+    except (AttributeError, OSError):
+        return None
+
+    buffer.write(CPUID_CODE + XGETBV_CODE)
+    code = ctypes.c_char.from_buffer(buffer)
+    try:
+        address = ctypes.addressof(code)
+        cpuid = ctypes.CFUNCTYPE(
+            None,
+            ctypes.c_uint32,
+            ctypes.c_uint32,
+            ctypes.POINTER(ctypes.c_uint32))(address)
+        xgetbv = ctypes.CFUNCTYPE(
+            ctypes.c_uint64,
+            ctypes.c_uint32)(address + len(CPUID_CODE))
+
+        return read_cpuid_flags(cpuid, xgetbv)
+    finally:
+        # Release the buffer export before unmapping the memory
+        del code
+        buffer.close()
+
+
+@functools.lru_cache(maxsize = 1)
+def get_current_cpu_flags() -> FrozenSet[str]:
+    """
+    Returns CPU flags supported by current cpu.
+
+    Uses the cpuid instruction if possible and falls back to parsing
+    /proc/cpuinfo otherwise. CPU flags do not change while running so the
+    result is cached.
+
+    :return: Set of cpu flags supported
+    :rtype: frozenset
+    """
+
+    flags = get_cpuid_flags()
+    if flags is not None:
+        return frozenset(flags)
+
+    return get_cpuinfo_flags()
+
+
+def get_flag_mask(flags: AbstractSet[str]) -> int:
+    """
+    Encodes the features signaled by given flags as bit mask of FEATURE_BITS.
+    Unknown flags are ignored.
+
+    :param flags: Set of flags to encode
+    :type flags: set
+
+    :return: Bit mask of supported features
+    :rtype: int
+    """
+
+    mask = 0
+    for flag, bits in FLAG_BITS.items():
+        if flag in flags:
+            mask |= bits
+    return mask
+
+
+def supports_feature(flags: AbstractSet[str], feature: str) -> bool:
+    """
+    Checks if the given flags indicate support of a given feature.
+
+    :param flags: Set of flags to check for support of given feature
+    :type flags: set
+
+    :param feature: Feature to check support of
+    :type flags: str
+
+    :return: True if support of feature is indicated by given flags.
+        False otherwise
+    :rtype: bool
+    """
+
+    # Any of the flags signals this feature
+    required_flags = FLAG_NAMES.get(feature)
+    if required_flags is None:
+        raise Exception('Unknown feature flag "{}"'.format(feature))
+
+    return any(flag in flags for flag in required_flags)
+
+
+def supports_features(flags: AbstractSet[str], required_features: List[str]) -> bool:
+    """
+    Checks if the given flags indicate support of all given features.
+
+    :param flags: Set of flags to check for support of given features
+    :type flags: set
+
+    :param required_features: Features to check support of
+    :type required_features: list
+
+    :return: True if support of all given features is indicated by flags.
+        False otherwise
+    :rtype: bool
+    """
+
+    return all(supports_feature(flags, feat) for feat in required_features)
+
+
+def supports_feature_set(flags: AbstractSet[str], feature_set: str) -> bool:
+    """
+    Checks if the given flags indicate support of a given feature set.
+
+    :param flags: Set of flags to check for support of given feature set
+    :type flags: set
+
+    :param feature_set: Feature set to check support of
+    :type feature_set: list
+
+    :return: True if support of feature set is indicated by given flags.
+        False otherwise
+    :rtype: bool
+    """
+
+    if feature_set not in LEVEL_MASKS:
+        raise Exception('Unknown feature set "{}"'.format(feature_set))
+
+    return get_flag_mask(flags) & LEVEL_MASKS[feature_set] == LEVEL_MASKS[feature_set]
+
+
+def supports_architecture_level(flags: AbstractSet[str], level: str) -> bool:
+    """
+    Checks if the given flags indicate support of a given microarchitecture
+    level and all previous levels.
+
+    :param flags: Set of flags to check for support of given level
+    :type flags: set
+
+    :param level: Microarchitecture level to check support of
+    :type level: str
+
+    :return: True if support of level is indicated by given flags.
+        False otherwise
+    :rtype: bool
+    """
+
+    if level not in CUMULATIVE_MASKS:
+        raise Exception('Unknown feature set "{}"'.format(level))
+
+    return get_flag_mask(flags) & CUMULATIVE_MASKS[level] == CUMULATIVE_MASKS[level]
+
+
+def get_max_architecture_level(flags) -> Optional[str]:
+    """
+    Returns the latest supported microarchitecture level indicated by given flags.
+
+    :param flags: Set of flags to check for microarchitecture level support
+    :type flags: set
+
+    :return: The latest microarchitecture level that is supported or None if no
+        known microarchitecture level is supported
+    :rtype: str
+    """
+
+    flag_mask = get_flag_mask(flags)
+
+    # Levels are additive so supported levels form a tail of
+    # MICROARCHITECTURE_LEVELS. Bisect for the first supported one.
+    low = 0
+    high = len(MICROARCHITECTURE_LEVELS)
+    while low < high:
+        middle = (low + high) // 2
+        level_mask = CUMULATIVE_MASKS[MICROARCHITECTURE_LEVELS[middle]]
+        if flag_mask & level_mask == level_mask:
+            high = middle
+        else:
+            low = middle + 1
+
+    if low == len(MICROARCHITECTURE_LEVELS):
+        return None
+    return MICROARCHITECTURE_LEVELS[low]
+
+
+def get_all_architecture_levels(flags) -> List[str]:
+    flag_mask = get_flag_mask(flags)
+    supported = []
+    for lvl in MICROARCHITECTURE_LEVELS:
+        level_mask = CUMULATIVE_MASKS[lvl]
+        if flag_mask & level_mask == level_mask:
+            supported.append(lvl)
+    supported.reverse()
+    return supported
+
+
+if __name__ == '__main__':
+    sys.exit(main())